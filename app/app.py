@@ -2,13 +2,12 @@ import base64
 import time
 from flask import Flask, request, jsonify
 import requests
-from conductor.client.workflow_client import WorkflowClient
-from conductor.client.configuration.configuration import Configuration
 
-# Configuration setup
-config = Configuration(
-    base_url="http://localhost:8080/api",  
-    debug=True  
+from app.utils.store import (
+    QUERY_FIELDS,
+    get_submission,
+    next_cursor,
+    query_submissions,
 )
 
 app = Flask(__name__)
@@ -17,6 +16,11 @@ CONDUCTOR_URL = 'http://localhost:8080/api'
 
 WORKFLOW_NAME = 'get_submission_analysis'
 
+MAX_QUERY_LIMIT = 1000
+
+# Deeper pages should use the before cursor, which does not scan skipped rows
+MAX_QUERY_OFFSET = 10000
+
 @app.route('/start-workflow', methods=['POST'])
 def start_workflow():
     file = request.files['file']
@@ -90,5 +94,57 @@ def start_workflow():
     except Exception as e:
         return jsonify({"error": f"Error triggering/tracking workflow: {str(e)}"}), 500
     
+@app.route('/submissions/<tx_id>', methods=['GET'])
+def get_stored_submission(tx_id):
+    submission = get_submission(tx_id)
+    if submission is None:
+        return jsonify({"error": "Submission not found", "tx_id": tx_id}), 404
+    return jsonify(submission), 200
+
+
+@app.route('/submissions', methods=['GET'])
+def search_submissions():
+    filters = {
+        field: request.args[field]
+        for field in QUERY_FIELDS
+        if request.args.get(field)
+    }
+
+    try:
+        limit = min(int(request.args.get('limit', 100)), MAX_QUERY_LIMIT)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "limit and offset must be integers"}), 400
+
+    if limit < 1 or offset < 0:
+        return jsonify({"error": "limit must be >= 1 and offset must be >= 0"}), 400
+    if offset > MAX_QUERY_OFFSET:
+        return jsonify({
+            "error": f"offset must be <= {MAX_QUERY_OFFSET}, use before to page further"
+        }), 400
+
+    inception_from = request.args.get('inception_from')
+    inception_to = request.args.get('inception_to')
+    try:
+        submissions = query_submissions(
+            filters=filters,
+            primary_sic=request.args.get('primary_sic'),
+            inception_from=inception_from,
+            inception_to=inception_to,
+            limit=limit,
+            offset=offset,
+            before=request.args.get('before'),
+            include_data=request.args.get('include_data', '').lower() in ('1', 'true'),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "count": len(submissions),
+        "next_before": next_cursor(submissions, bool(inception_from or inception_to)),
+        "submissions": submissions,
+    }), 200
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=3000)
@@ -1,6 +1,9 @@
 import json
+
+from app.utils.profiling import profiled
  
  
+@profiled()
 def parse_us_common(json_data):
     data = json_data.get("data", {})
     scores = json_data.get("scores", {})
@@ -81,6 +84,7 @@ def parse_us_common(json_data):
     return structured_data
  
  
+@profiled()
 def parse_property_json(property_json):
     parsed_data = []
  
@@ -140,6 +144,7 @@ def parse_property_json(property_json):
     return parsed_data
  
  
+@profiled()
 def parse_advanced_property(input_json):
     data = input_json
     advanced_property = []
@@ -208,6 +213,7 @@ def parse_advanced_property(input_json):
     return advanced_property
  
  
+@profiled()
 def parse_general_liability(gl_json):
     data = gl_json
  
@@ -232,6 +238,7 @@ def parse_general_liability(gl_json):
     return processed_gl
  
  
+@profiled()
 def parse_auto(auto_json):
     data = auto_json
  
@@ -0,0 +1,392 @@
+"""
+On-demand profiling for worker execute functions and parsers.
+
+Profiling is off by default and is configured from environment variables,
+which can be overridden at runtime by a JSON control file using the same
+names in lower case, e.g. {"profile_tasks": "*", "profile_memory": true}
+(no redeploy needed, changes are picked up within a second):
+
+    PROFILE_TASKS        comma separated task/parser names, "*" for all
+    PROFILE_SAMPLE_RATE  fraction of matching calls to profile (default 1.0)
+    PROFILE_MEMORY       "1" to also record tracemalloc snapshots
+    PROFILE_DIR          output directory (default "profiles")
+    PROFILE_CONTROL_FILE control file path (default "<PROFILE_DIR>/control.json")
+
+Each profiled call writes a cProfile dump and optional allocation snapshot
+under <PROFILE_DIR>/<name>/ and appends a line to <PROFILE_DIR>/summary.jsonl.
+Run ``python -m app.utils.profiling [PROFILE_DIR]`` to build report.txt.
+"""
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+DEFAULT_PROFILE_DIR = "profiles"
+
+# Seconds between control file checks
+CONTROL_FILE_CHECK_INTERVAL = 1.0
+
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 25
+
+# Control file key -> settings key
+CONTROL_FILE_KEYS = {
+    "profile_tasks": "tasks",
+    "profile_sample_rate": "sample_rate",
+    "profile_memory": "memory",
+    "profile_dir": "dir",
+}
+
+_settings = None
+_settings_checked_at = 0.0
+_control_file_mtime = None
+_local = threading.local()
+
+# tracemalloc is process-wide, so overlapping profiled calls share it
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_started = False
+
+
+def _env_settings():
+    profile_dir = os.getenv("PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    return {
+        "tasks": os.getenv("PROFILE_TASKS", ""),
+        "sample_rate": os.getenv("PROFILE_SAMPLE_RATE", "1.0"),
+        "memory": os.getenv("PROFILE_MEMORY", "0"),
+        "dir": profile_dir,
+        "control_file": os.getenv(
+            "PROFILE_CONTROL_FILE", os.path.join(profile_dir, "control.json")
+        ),
+    }
+
+
+def _normalize(settings):
+    tasks = settings.get("tasks") or []
+    if isinstance(tasks, str):
+        tasks = [name.strip() for name in tasks.split(",") if name.strip()]
+    memory = settings.get("memory")
+    if isinstance(memory, str):
+        memory = memory.lower() in ("1", "true", "yes")
+    return {
+        "tasks": set(tasks),
+        "sample_rate": max(0.0, min(float(settings.get("sample_rate", 1.0)), 1.0)),
+        "memory": bool(memory),
+        "dir": settings.get("dir") or DEFAULT_PROFILE_DIR,
+        "control_file": settings.get("control_file"),
+    }
+
+
+def get_settings():
+    """
+    Returns the current profiling settings, re-reading the control file
+    when it has changed. Invalid control files are reported and ignored.
+    """
+    global _settings, _settings_checked_at, _control_file_mtime
+
+    now = time.monotonic()
+    if _settings is not None and now - _settings_checked_at < CONTROL_FILE_CHECK_INTERVAL:
+        return _settings
+    _settings_checked_at = now
+
+    settings = _env_settings()
+    try:
+        mtime = os.stat(settings["control_file"]).st_mtime
+    except OSError:
+        mtime = None
+
+    if _settings is not None and mtime == _control_file_mtime:
+        return _settings
+    _control_file_mtime = mtime
+
+    if mtime is not None:
+        try:
+            with open(settings["control_file"]) as f:
+                overrides = json.load(f)
+            if not isinstance(overrides, dict):
+                raise ValueError("expected a JSON object")
+        except (OSError, ValueError) as e:
+            print(f"Ignoring profiling control file {settings['control_file']}: {e}")
+        else:
+            for key, value in overrides.items():
+                if key in CONTROL_FILE_KEYS:
+                    settings[CONTROL_FILE_KEYS[key]] = value
+                else:
+                    print(f"Ignoring unknown profiling control file key: {key}")
+
+    try:
+        _settings = _normalize(settings)
+    except (TypeError, ValueError) as e:
+        print(f"Invalid profiling settings, profiling disabled: {e}")
+        _settings = _normalize({"dir": settings["dir"]})
+    return _settings
+
+
+def _should_profile(name, settings):
+    tasks = settings["tasks"]
+    if not tasks or ("*" not in tasks and name not in tasks):
+        return False
+    return random.random() < settings["sample_rate"]
+
+
+@contextmanager
+def profile_section(name):
+    """
+    Times a block inside the active profiled call so it shows up as a
+    separate section in the summary. Does nothing when nothing is profiled.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        section = session["sections"].setdefault(name, {"calls": 0, "seconds": 0.0})
+        section["calls"] += 1
+        section["seconds"] += time.perf_counter() - start
+
+
+def profiled(name=None):
+    """
+    Decorator that profiles calls of the wrapped function when its name is
+    enabled. Calls nested in an already profiled call are recorded as
+    sections of that call instead of starting another profiler.
+    """
+
+    def decorator(func):
+        profile_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "session", None) is not None:
+                with profile_section(profile_name):
+                    return func(*args, **kwargs)
+
+            settings = get_settings()
+            if not _should_profile(profile_name, settings):
+                return func(*args, **kwargs)
+            return _run_profiled(profile_name, settings, func, args, kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _acquire_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            _tracemalloc_started = not tracemalloc.is_tracing()
+            if _tracemalloc_started:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _tracemalloc_users += 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+
+
+def _run_profiled(name, settings, func, args, kwargs):
+    """
+    Runs func under cProfile (and tracemalloc when enabled). Profiling
+    failures are reported and never change the result of func.
+    """
+    # Imported here so importing the workers and parsers stays cheap
+    import cProfile
+
+    session = {"sections": {}}
+    trace_memory = False
+    try:
+        if settings["memory"]:
+            _acquire_tracemalloc()
+            trace_memory = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+    except Exception as e:
+        print(f"Error starting profiler for {name}: {e}")
+        if trace_memory:
+            _release_tracemalloc()
+        return func(*args, **kwargs)
+
+    error = None
+    started_at = time.time()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    _local.session = session
+    try:
+        return func(*args, **kwargs)
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        _local.session = None
+        try:
+            profiler.disable()
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            snapshot = None
+            peak_memory = None
+            if trace_memory:
+                # Overlapping calls share one trace, so the peak is an upper bound
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                snapshot = tracemalloc.take_snapshot()
+
+            _write_profile(
+                settings["dir"],
+                name,
+                profiler,
+                snapshot,
+                {
+                    "task": name,
+                    "started_at": started_at,
+                    "pid": os.getpid(),
+                    "wall_seconds": round(wall, 6),
+                    "cpu_seconds": round(cpu, 6),
+                    "peak_memory_bytes": peak_memory,
+                    "sections": session["sections"],
+                    "error": error,
+                },
+            )
+        except Exception as e:
+            print(f"Error writing profile for {name}: {e}")
+        finally:
+            if trace_memory:
+                _release_tracemalloc()
+
+
+def _top_functions(stats, limit=TOP_FUNCTIONS):
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({func})",
+            "calls": calls,
+            "total_seconds": round(total, 6),
+            "cumulative_seconds": round(cumulative, 6),
+        }
+        for (filename, line, func), (_, calls, total, cumulative, _) in rows[:limit]
+    ]
+
+
+def _write_profile(profile_dir, name, profiler, snapshot, summary):
+    import pstats
+
+    task_dir = os.path.join(profile_dir, name)
+    os.makedirs(task_dir, exist_ok=True)
+    stem = os.path.join(
+        task_dir,
+        time.strftime("%Y%m%dT%H%M%S", time.localtime(summary["started_at"]))
+        + f"-{summary['pid']}-{random.randrange(16 ** 4):04x}",
+    )
+
+    profile_path = stem + ".prof"
+    profiler.dump_stats(profile_path)
+    summary["profile"] = profile_path
+    summary["top_functions"] = _top_functions(pstats.Stats(profiler))
+
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        snapshot_path = stem + ".mem.txt"
+        with open(snapshot_path, "w") as f:
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        summary["memory_snapshot"] = snapshot_path
+
+    with open(os.path.join(profile_dir, "summary.jsonl"), "a") as f:
+        f.write(json.dumps(summary) + "\n")
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def write_report(profile_dir=None):
+    """
+    Aggregates summary.jsonl into report.txt: per-name timing and memory
+    statistics, section totals and the most frequent hot functions.
+    Returns the report text.
+    """
+    profile_dir = profile_dir or get_settings()["dir"]
+    runs = {}
+    with open(os.path.join(profile_dir, "summary.jsonl")) as f:
+        for line in f:
+            if line.strip():
+                summary = json.loads(line)
+                runs.setdefault(summary["task"], []).append(summary)
+
+    lines = []
+    for name, summaries in sorted(runs.items()):
+        walls = [summary["wall_seconds"] for summary in summaries]
+        cpus = [summary["cpu_seconds"] for summary in summaries]
+        peaks = [
+            summary["peak_memory_bytes"]
+            for summary in summaries
+            if summary.get("peak_memory_bytes") is not None
+        ]
+        errors = sum(1 for summary in summaries if summary.get("error"))
+
+        lines.append(f"== {name} ({len(summaries)} runs, {errors} errors)")
+        lines.append(
+            f"  wall  mean {sum(walls) / len(walls):.3f}s"
+            f"  p95 {_percentile(walls, 0.95):.3f}s  max {max(walls):.3f}s"
+        )
+        lines.append(f"  cpu   mean {sum(cpus) / len(cpus):.3f}s  max {max(cpus):.3f}s")
+        if peaks:
+            lines.append(f"  peak memory max {max(peaks) / 1024 / 1024:.1f} MiB")
+
+        sections = {}
+        for summary in summaries:
+            for section, values in summary.get("sections", {}).items():
+                total = sections.setdefault(section, {"calls": 0, "seconds": 0.0})
+                total["calls"] += values["calls"]
+                total["seconds"] += values["seconds"]
+        if sections:
+            lines.append("  sections:")
+            for section, total in sorted(
+                sections.items(), key=lambda item: item[1]["seconds"], reverse=True
+            ):
+                lines.append(
+                    f"    {section:<32} {total['seconds']:.3f}s"
+                    f" over {total['calls']} calls"
+                )
+
+        hot = {}
+        for summary in summaries:
+            for function in summary.get("top_functions", []):
+                hot[function["function"]] = (
+                    hot.get(function["function"], 0.0) + function["cumulative_seconds"]
+                )
+        if hot:
+            lines.append("  hot functions (cumulative):")
+            for function, seconds in sorted(
+                hot.items(), key=lambda item: item[1], reverse=True
+            )[:TOP_FUNCTIONS]:
+                lines.append(f"    {seconds:9.3f}s  {function}")
+        lines.append("")
+
+    report = "\n".join(lines)
+    with open(os.path.join(profile_dir, "report.txt"), "w") as f:
+        f.write(report)
+    return report
+
+
+if __name__ == "__main__":
+    print(write_report(sys.argv[1] if len(sys.argv) > 1 else None))
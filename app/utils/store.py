@@ -0,0 +1,365 @@
+import base64
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "submissions.db")
+
+# Firmographics keys that may hold the insured's state, in order of preference
+INSURED_STATE_KEYS = ["insured_state", "mailing_state", "state"]
+
+# Upstream date formats normalized to ISO YYYY-MM-DD before indexing
+DATE_FORMATS = ["%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y"]
+
+# Query parameter -> indexed column
+QUERY_FIELDS = {
+    "tx_id": "tx_id",
+    "broker_name": "broker_name",
+    "insured_state": "insured_state",
+    "policy_inception_date": "policy_inception_date",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    tx_id TEXT PRIMARY KEY,
+    broker_name TEXT,
+    insured_state TEXT,
+    policy_inception_date TEXT,
+    created_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS submission_sic (
+    tx_id TEXT NOT NULL REFERENCES submissions (tx_id) ON DELETE CASCADE,
+    sic TEXT NOT NULL,
+    -- Copy of submissions.created_at so SIC lookups page from this index
+    created_at REAL NOT NULL,
+    PRIMARY KEY (tx_id, sic)
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_broker_name
+    ON submissions (broker_name COLLATE NOCASE, created_at, tx_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_insured_state
+    ON submissions (insured_state COLLATE NOCASE, created_at, tx_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_insured_state_inception_date
+    ON submissions (
+        insured_state COLLATE NOCASE, policy_inception_date, created_at, tx_id
+    );
+CREATE INDEX IF NOT EXISTS idx_submissions_policy_inception_date
+    ON submissions (policy_inception_date, created_at, tx_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_created_at
+    ON submissions (created_at, tx_id);
+CREATE INDEX IF NOT EXISTS idx_submission_sic_sic
+    ON submission_sic (sic, created_at, tx_id);
+"""
+
+_local = threading.local()
+
+
+def get_connection(path=None):
+    """
+    Returns a connection for the current thread, opening it on first use.
+    Connections are never shared across threads or forked worker processes.
+    """
+    path = path or RESULT_STORE_PATH
+
+    if (
+        getattr(_local, "connection", None) is None
+        or _local.pid != os.getpid()
+        or _local.path != path
+    ):
+        connection = sqlite3.connect(path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        connection.executescript(SCHEMA)
+        _local.connection, _local.pid, _local.path = connection, os.getpid(), path
+
+    return _local.connection
+
+
+def analyze(path=None):
+    """
+    Refreshes planner statistics so multi-field filters pick the most
+    selective index. Run periodically as maintenance, e.g.
+    ``python -m app.utils.store analyze``; analysis_limit keeps it cheap
+    on large stores.
+    """
+    connection = get_connection(path)
+    connection.execute("PRAGMA analysis_limit=1000")
+    connection.execute("ANALYZE")
+    connection.commit()
+
+
+def _value(field):
+    """Unwraps a {"value": ..., "score": ...} field produced by the parsers."""
+    if isinstance(field, dict) and "value" in field:
+        field = field["value"]
+    if field in (None, "", [], {}):
+        return None
+    return field
+
+
+def normalize_date(value):
+    """
+    Returns value as an ISO YYYY-MM-DD string so dates compare correctly.
+    ISO timestamps are truncated to the date; unrecognized values are
+    returned unchanged and will not order correctly in range queries.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    candidates = [value, value[:10]] if len(value) > 10 else [value]
+    for candidate in candidates:
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, date_format).date().isoformat()
+            except ValueError:
+                continue
+    return value
+
+
+def extract_index_fields(structured_response):
+    """Pulls the indexed fields out of a fetch_submission_data response."""
+    common = structured_response.get("Common") or {}
+    firmographics = common.get("Firmographics") or {}
+    broker_details = common.get("Broker Details") or {}
+    product_details = common.get("Product Details") or {}
+
+    insured_state = None
+    for key in INSURED_STATE_KEYS:
+        insured_state = _value(firmographics.get(key))
+        if insured_state is not None:
+            break
+
+    sic_codes = _value(firmographics.get("primary_sic")) or []
+    if not isinstance(sic_codes, list):
+        sic_codes = [sic_codes]
+    # Entries may be bare codes or {"code": ..., "description": ...} objects
+    sic_codes = [
+        sic.get("code", sic.get("value")) if isinstance(sic, dict) else sic
+        for sic in sic_codes
+    ]
+
+    broker_name = _value(broker_details.get("broker_name"))
+    policy_inception_date = _value(product_details.get("policy_inception_date"))
+
+    return {
+        "broker_name": str(broker_name) if broker_name is not None else None,
+        "insured_state": str(insured_state) if insured_state is not None else None,
+        "policy_inception_date": normalize_date(policy_inception_date),
+        "primary_sic": sorted(
+            {str(sic).strip() for sic in sic_codes if sic not in (None, "")}
+        ),
+    }
+
+
+def save_submission(tx_id, structured_response, path=None):
+    """
+    Inserts or updates the parsed submission for tx_id. Sections already
+    stored are kept when a later response for the same tx_id lacks them
+    (e.g. a retry where some data packages failed to fetch), so a retry can
+    only add to a stored submission. Empty responses are not stored.
+    Returns True when the store was written.
+    """
+    if not tx_id:
+        raise ValueError("No tx_id provided")
+    if not structured_response:
+        return False
+
+    connection = get_connection(path)
+
+    with connection:
+        # Take the write lock before reading so concurrent saves can't race
+        connection.execute("BEGIN IMMEDIATE")
+        row = connection.execute(
+            "SELECT data FROM submissions WHERE tx_id = ?", (tx_id,)
+        ).fetchone()
+        if row is not None:
+            structured_response = {**json.loads(row["data"]), **structured_response}
+        fields = extract_index_fields(structured_response)
+        created_at = time.time()
+
+        connection.execute(
+            """
+            INSERT OR REPLACE INTO submissions (
+                tx_id, broker_name, insured_state, policy_inception_date,
+                created_at, data
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                tx_id,
+                fields["broker_name"],
+                fields["insured_state"],
+                fields["policy_inception_date"],
+                created_at,
+                json.dumps(structured_response),
+            ),
+        )
+        connection.execute("DELETE FROM submission_sic WHERE tx_id = ?", (tx_id,))
+        connection.executemany(
+            "INSERT INTO submission_sic (tx_id, sic, created_at) VALUES (?, ?, ?)",
+            [(tx_id, sic, created_at) for sic in fields["primary_sic"]],
+        )
+    return True
+
+
+def _row_to_submission(row, sic_codes, include_data=True):
+    submission = {
+        "tx_id": row["tx_id"],
+        "broker_name": row["broker_name"],
+        "insured_state": row["insured_state"],
+        "primary_sic": sic_codes,
+        "policy_inception_date": row["policy_inception_date"],
+        "created_at": row["created_at"],
+    }
+    if include_data:
+        submission["structured_response"] = json.loads(row["data"])
+    return submission
+
+
+def _sic_codes(connection, tx_ids):
+    codes = {tx_id: [] for tx_id in tx_ids}
+    if not tx_ids:
+        return codes
+    placeholders = ", ".join("?" for _ in tx_ids)
+    rows = connection.execute(
+        f"SELECT tx_id, sic FROM submission_sic WHERE tx_id IN ({placeholders})"
+        " ORDER BY sic",
+        tx_ids,
+    )
+    for row in rows:
+        codes[row["tx_id"]].append(row["sic"])
+    return codes
+
+
+def get_submission(tx_id, path=None):
+    """Returns the stored submission for tx_id, or None if it is unknown."""
+    connection = get_connection(path)
+    row = connection.execute(
+        "SELECT * FROM submissions WHERE tx_id = ?", (tx_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return _row_to_submission(row, _sic_codes(connection, [tx_id])[tx_id])
+
+
+def query_submissions(
+    filters=None,
+    primary_sic=None,
+    inception_from=None,
+    inception_to=None,
+    limit=100,
+    offset=0,
+    before=None,
+    include_data=False,
+    path=None,
+):
+    """
+    Looks up submissions by any combination of the indexed fields.
+    String filters are exact, case-insensitive matches; inception_from and
+    inception_to bound policy_inception_date inclusively.
+
+    Results are ordered newest first, or by policy_inception_date (latest
+    first) when an inception range is given so the range is read straight
+    from its index. Pass the next_cursor() of the last page as before to
+    continue after it without scanning skipped rows the way offset does.
+
+    Index-served combinations: any single filter, primary_sic alone, an
+    inception range alone or with insured_state. Other combinations scan the
+    rows matching one filter (or sort them, with an inception range), so
+    they slow down as that filter matches more rows.
+    """
+    clauses = []
+    params = []
+
+    for field, value in (filters or {}).items():
+        if field not in QUERY_FIELDS:
+            raise ValueError(f"Unsupported query field: {field}")
+        column = QUERY_FIELDS[field]
+        if column in ("broker_name", "insured_state"):
+            clauses.append(f"s.{column} = ? COLLATE NOCASE")
+        elif column == "policy_inception_date":
+            clauses.append(f"s.{column} = ?")
+            value = normalize_date(value)
+        else:
+            clauses.append(f"s.{column} = ?")
+        params.append(value)
+
+    if inception_from:
+        clauses.append("s.policy_inception_date >= ?")
+        params.append(normalize_date(inception_from))
+    if inception_to:
+        clauses.append("s.policy_inception_date <= ?")
+        params.append(normalize_date(inception_to))
+    by_inception = bool(inception_from or inception_to)
+
+    # SIC lookups walk (sic, created_at, tx_id) and join each match, so a
+    # common code is paged from its index instead of sorting every match
+    source = "submissions s"
+    key = "s"
+    if primary_sic:
+        source = "submission_sic c CROSS JOIN submissions s ON s.tx_id = c.tx_id"
+        clauses.append("c.sic = ?")
+        params.append(primary_sic)
+        if not by_inception:
+            key = "c"
+    if before:
+        cursor = _decode_cursor(before, by_inception)
+        if by_inception:
+            clauses.append(
+                "(s.policy_inception_date, s.created_at, s.tx_id) < (?, ?, ?)"
+            )
+        else:
+            clauses.append(f"({key}.created_at, {key}.tx_id) < (?, ?)")
+        params.extend(cursor)
+
+    # tx_id breaks ties between submissions saved in the same clock tick
+    if by_inception:
+        order_by = "s.policy_inception_date DESC, s.created_at DESC, s.tx_id DESC"
+    else:
+        order_by = f"{key}.created_at DESC, {key}.tx_id DESC"
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    connection = get_connection(path)
+    rows = connection.execute(
+        f"SELECT s.* FROM {source} {where}"
+        f" ORDER BY {order_by} LIMIT ? OFFSET ?",
+        params + [limit, offset],
+    ).fetchall()
+
+    sic_codes = _sic_codes(connection, [row["tx_id"] for row in rows])
+    return [
+        _row_to_submission(row, sic_codes[row["tx_id"]], include_data)
+        for row in rows
+    ]
+
+
+def next_cursor(submissions, by_inception=False):
+    """Returns the before value that continues after the last submission."""
+    if not submissions:
+        return None
+    last = submissions[-1]
+    key = [last["created_at"], last["tx_id"]]
+    if by_inception:
+        key.insert(0, last["policy_inception_date"])
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(before, by_inception):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(str(before).encode()))
+        if not isinstance(key, list) or len(key) != (3 if by_inception else 2):
+            raise ValueError
+        return key
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {before}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["analyze"]:
+        sys.exit("usage: python -m app.utils.store analyze [PATH]")
+    analyze(sys.argv[2] if len(sys.argv) > 2 else None)
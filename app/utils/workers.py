@@ -1,12 +1,7 @@
+import argparse
 import tempfile
 import time
-from conductor.client.automator.task_handler import TaskHandler
-from conductor.client.configuration.configuration import Configuration
-from conductor.client.configuration.configuration import AuthenticationSettings
-from conductor.client.worker.worker import Worker
-from dotenv import load_dotenv
 import os
-import requests
  
 from app.utils.parsers import (
     parse_advanced_property,
@@ -15,11 +10,11 @@ from app.utils.parsers import (
     parse_property_json,
     parse_us_common,
 )
- 
-load_dotenv(override=True)
+from app.utils.profiling import profile_section, profiled
+from app.utils.store import save_submission
  
 # Conductor API URL
-API_URL = "http://localhost:8080/api"
+API_URL = os.getenv("CONDUCTOR_SERVER_URL", "http://localhost:8080/api")
  
 DATA_PACKAGE_IDS = [
     "elevate-us-common-c0001",
@@ -31,13 +26,16 @@ DATA_PACKAGE_IDS = [
     "elevate-us-admitted-workers-comp-c0001",
 ]
  
-# Authentication settings
+ 
+def build_configuration(server_api_url=API_URL):
+    """Builds the Conductor Configuration, importing the client lazily."""
+    from conductor.client.configuration.configuration import Configuration
+
+    return Configuration(
+        server_api_url=server_api_url,
+        auth_token_ttl_min=45,
+    )
 
-# Conductor Configuration
-config = Configuration(
-    server_api_url=API_URL,
-    auth_token_ttl_min=45,
-)
 
 def wait_for_file_upload(task):
     # Directly receive file from workflow input
@@ -60,6 +58,8 @@ def wait_for_file_upload(task):
  
 # Worker for retrieving auth token
 def my_task_function(task):
+    import requests
+
     print(f"Getting auth token for BP service")
  
     auth_url = "https://boldpenguin-auth-uat.beta.boldpenguin.com/auth/token"
@@ -92,6 +92,8 @@ def my_task_function(task):
  
  
 def get_upload_url(task):
+    import requests
+
     input_data = task.input_data
     
     # Get filename from previous task (wait_for_file_upload)
@@ -135,6 +137,8 @@ def get_upload_url(task):
  
 def upload_file(task):
     """Uploads the file to the provided upload URL using multipart/form-data."""
+    import requests
+
     print(f"Uploading file worker at work sir!")
     try:
         input_data = task.input_data
@@ -201,6 +205,8 @@ def upload_file(task):
  
  
 def trigger_processing(task):
+    import requests
+
     input_data = task.input_data
     auth_token = input_data.get("auth_token", "")
     tx_id = input_data.get("tx_id", "")
@@ -219,6 +225,8 @@ def trigger_processing(task):
  
  
 def poll_submission_status(task):
+    import requests
+
     input_data = task.input_data
     auth_token = input_data.get("auth_token", "")
     tx_id = input_data.get("tx_id", "")
@@ -269,6 +277,7 @@ def fetch_submission_data(task):
     Returns a list of results in the same order as dp_ids.
     If a dp_id doesn't return data, None is added in its place.
     """
+    import requests
  
     input_data = task.input_data
     print(input_data)
@@ -304,7 +313,8 @@ def fetch_submission_data(task):
             response = requests.get(url, headers=headers)
  
             if response.status_code == 200:
-                raw_data = response.json()
+                with profile_section("json_decode"):
+                    raw_data = response.json()
  
                 # Call the respective parser
                 if dp_id == "elevate-us-common-c0001":
@@ -333,45 +343,129 @@ def fetch_submission_data(task):
         except Exception as e:
             print(f"Error fetching {dp_id}: {e}")
  
+    # Keep a local, indexed copy of the parsed submission for later lookups
+    try:
+        if not save_submission(tx_id, structured_response):
+            print(f"No data fetched for {tx_id}, nothing stored")
+    except Exception as e:
+        print(f"Error storing submission {tx_id}: {e}")
+ 
     return structured_response
  
  
-# Register Workers
-worker_auth = Worker(
-    task_definition_name="generate_auth_token", execute_function=my_task_function
-)
-worker_get_upload_url = Worker(
-    task_definition_name="get_upload_url", execute_function=get_upload_url
-)
-worker_upload_file = Worker(
-    task_definition_name="upload_file", execute_function=upload_file
-)
-worker_trigger_processing = Worker(
-    task_definition_name="trigger_processing", execute_function=trigger_processing
-)
-worker_poll_submission_status = Worker(
-    task_definition_name="poll_submission_status",
-    execute_function=poll_submission_status,
-)
-worker_fetch_submission_data = Worker(
-    task_definition_name="fetch_submission_data",
-    execute_function=fetch_submission_data,
-)
-worker_callback = Worker(
-    task_definition_name="wait_for_file_upload",
-    execute_function=wait_for_file_upload
-)
+# Task definition name -> execute function, in workflow order
+TASK_FUNCTIONS = {
+    "wait_for_file_upload": wait_for_file_upload,
+    "generate_auth_token": my_task_function,
+    "get_upload_url": get_upload_url,
+    "upload_file": upload_file,
+    "trigger_processing": trigger_processing,
+    "poll_submission_status": poll_submission_status,
+    "fetch_submission_data": fetch_submission_data,
+}
  
-handler = TaskHandler(
-    configuration=config,
-    workers=[
-        worker_callback,
-        worker_auth,
-        worker_get_upload_url,
-        worker_upload_file,
-        worker_trigger_processing,
-        worker_poll_submission_status,
-        worker_fetch_submission_data,
-    ],
-)
-handler.start_processes()
\ No newline at end of file
+ 
+def check_task_names(task_names):
+    """Raises ValueError for names that are not in TASK_FUNCTIONS."""
+    unknown = [name for name in task_names if name not in TASK_FUNCTIONS]
+    if unknown:
+        raise ValueError(f"Unknown task definition name(s): {', '.join(unknown)}")
+ 
+ 
+def build_workers(task_names=None):
+    """
+    Creates a Worker for each selected task definition name.
+    All registered tasks are used when task_names is empty.
+    Execute functions are wrapped so they can be profiled on demand.
+    """
+    from conductor.client.worker.worker import Worker
+
+    task_names = list(task_names or TASK_FUNCTIONS)
+    check_task_names(task_names)
+
+    return [
+        Worker(
+            task_definition_name=name,
+            execute_function=profiled(name)(TASK_FUNCTIONS[name]),
+        )
+        for name in task_names
+    ]
+ 
+ 
+def build_task_handler(task_names=None, server_api_url=API_URL):
+    """Builds the configuration, workers and TaskHandler without starting it."""
+    from conductor.client.automator.task_handler import TaskHandler
+
+    # Task functions import requests lazily; load it once here so every
+    # forked worker inherits it instead of importing it on its first task
+    import requests  # noqa: F401
+
+    config = build_configuration(server_api_url)
+    workers = build_workers(task_names)
+
+    return TaskHandler(configuration=config, workers=workers)
+ 
+ 
+def start_workers(task_names=None, server_api_url=API_URL):
+    """
+    Builds everything in the parent process, then forks one polling
+    process per worker so children inherit the warmed-up state.
+    """
+    handler = build_task_handler(task_names, server_api_url)
+    handler.start_processes()
+    return handler
+ 
+ 
+def parse_task_names(values):
+    """Flattens repeated and comma separated --task values."""
+    names = []
+    for value in values or []:
+        names.extend(name.strip() for name in value.split(",") if name.strip())
+    return names
+ 
+ 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Conductor workers")
+    parser.add_argument(
+        "-t",
+        "--task",
+        action="append",
+        help="Task definition name(s) to poll, repeatable or comma separated "
+        "(default: $WORKER_TASKS or all tasks)",
+    )
+    parser.add_argument(
+        "--server-url",
+        default=None,
+        help="Conductor API URL (default: $CONDUCTOR_SERVER_URL or %s)" % API_URL,
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="List available task names and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(TASK_FUNCTIONS))
+        return 0
+
+    from dotenv import load_dotenv
+
+    load_dotenv(override=True)
+    server_api_url = args.server_url or os.getenv("CONDUCTOR_SERVER_URL", API_URL)
+
+    task_names = parse_task_names(args.task or [os.getenv("WORKER_TASKS", "")])
+    try:
+        check_task_names(task_names)
+    except ValueError as e:
+        parser.error(str(e))
+
+    handler = start_workers(task_names, server_api_url)
+
+    try:
+        handler.join_processes()
+    except KeyboardInterrupt:
+        handler.stop_processes()
+    return 0
+ 
+ 
+if __name__ == "__main__":
+    raise SystemExit(main())
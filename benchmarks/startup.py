@@ -0,0 +1,128 @@
+"""
+Measures worker cold start time in fresh interpreters.
+
+Compares the module as it was before the lazy entry point (read from git,
+default the baseline commit) with the current startup path doing the same
+work: load .env, build the Conductor configuration, every Worker and the
+TaskHandler, without starting processes. Both sides use the current
+app.utils.parsers. A ratio is printed only when both rows ran.
+
+Usage: python benchmarks/startup.py [--runs N] [--task NAME ...] [--baseline REV]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports the old module without its module-level handler.start_processes()
+BASELINE_SNIPPET = """
+import time, types, sys
+source = open({path!r}).read().replace("handler.start_processes()", "")
+start = time.perf_counter()
+module = types.ModuleType("workers_baseline")
+exec(compile(source, "workers_baseline.py", "exec"), module.__dict__)
+print(time.perf_counter() - start)
+"""
+
+STARTUP_SNIPPET = """
+import time
+start = time.perf_counter()
+from dotenv import load_dotenv
+from app.utils.workers import build_task_handler
+load_dotenv(override=True)
+build_task_handler({tasks!r})
+print(time.perf_counter() - start)
+"""
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import app.utils.workers
+print(time.perf_counter() - start)
+"""
+
+
+def run_snippet(snippet, runs):
+    """Returns (timings, error) for runs of snippet in fresh interpreters."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", snippet],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1]
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings, None
+
+
+def report(label, timings, error, baseline=None):
+    if error:
+        print(f"{label:<40} skipped ({error})")
+        return None
+    median = statistics.median(timings)
+    line = (
+        f"{label:<40} median {median * 1000:8.1f} ms"
+        f"  min {min(timings) * 1000:8.1f} ms  runs {len(timings)}"
+    )
+    if baseline:
+        line += f"  {baseline / median:5.1f}x faster than baseline"
+    print(line)
+    return median
+
+
+def read_baseline(rev):
+    """Writes app/utils/workers.py at rev to a temporary file."""
+    result = subprocess.run(
+        ["git", "show", f"{rev}:app/utils/workers.py"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return None, result.stderr.strip()
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as baseline_file:
+        baseline_file.write(result.stdout)
+    return baseline_file.name, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--task", action="append", default=[])
+    parser.add_argument("--baseline", default="19d7c10")
+    args = parser.parse_args(argv)
+    selected = args.task or ["fetch_submission_data"]
+
+    timings = None
+    path, error = read_baseline(args.baseline)
+    if path:
+        try:
+            timings, error = run_snippet(BASELINE_SNIPPET.format(path=path), args.runs)
+        finally:
+            os.remove(path)
+    baseline = report(f"baseline import ({args.baseline})", timings, error)
+
+    report(
+        "startup, all workers",
+        *run_snippet(STARTUP_SNIPPET.format(tasks=None), args.runs),
+        baseline=baseline,
+    )
+    report(
+        f"startup, {len(selected)} selected worker(s)",
+        *run_snippet(STARTUP_SNIPPET.format(tasks=selected), args.runs),
+        baseline=baseline,
+    )
+    # Not comparable to the baseline: no client imports or side effects
+    report("import app.utils.workers only", *run_snippet(IMPORT_SNIPPET, args.runs))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+import cProfile
+import io
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+from app.utils import profiling
+
+
+class ProfilingTest(unittest.TestCase):
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        self.control_file = os.path.join(self.profile_dir, "control.json")
+
+        env = mock.patch.dict(os.environ, {"PROFILE_DIR": self.profile_dir})
+        env.start()
+        self.addCleanup(env.stop)
+        for name in (
+            "PROFILE_TASKS",
+            "PROFILE_SAMPLE_RATE",
+            "PROFILE_MEMORY",
+            "PROFILE_CONTROL_FILE",
+        ):
+            os.environ.pop(name, None)
+
+        self.reset_settings()
+        self.addCleanup(self.reset_settings)
+
+    def reset_settings(self):
+        profiling._settings = None
+        profiling._settings_checked_at = 0.0
+        profiling._control_file_mtime = None
+
+    def write_control_file(self, overrides, mtime=None):
+        with open(self.control_file, "w") as f:
+            json.dump(overrides, f)
+        if mtime is not None:
+            os.utime(self.control_file, (mtime, mtime))
+
+    def summaries(self):
+        path = os.path.join(self.profile_dir, "summary.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def test_disabled_by_default(self):
+        settings = profiling.get_settings()
+        self.assertEqual(settings["tasks"], set())
+        self.assertEqual(settings["dir"], self.profile_dir)
+
+    def test_control_file_keys(self):
+        self.write_control_file(
+            {
+                "profile_tasks": "a, b",
+                "profile_sample_rate": 0.5,
+                "profile_memory": True,
+            }
+        )
+        settings = profiling.get_settings()
+        self.assertEqual(settings["tasks"], {"a", "b"})
+        self.assertEqual(settings["sample_rate"], 0.5)
+        self.assertTrue(settings["memory"])
+
+    def test_control_file_rejects_unknown_keys(self):
+        self.write_control_file({"tasks": "*", "profile_tasks": "a"})
+        output = io.StringIO()
+        with redirect_stdout(output):
+            settings = profiling.get_settings()
+        self.assertEqual(settings["tasks"], {"a"})
+        self.assertIn("unknown profiling control file key: tasks", output.getvalue())
+
+    def test_control_file_rejects_bad_values(self):
+        self.write_control_file({"profile_tasks": "*", "profile_sample_rate": "x"})
+        with redirect_stdout(io.StringIO()):
+            settings = profiling.get_settings()
+        self.assertEqual(settings["tasks"], set())
+
+        self.reset_settings()
+        with open(self.control_file, "w") as f:
+            json.dump(["profile_tasks"], f)
+        with redirect_stdout(io.StringIO()):
+            settings = profiling.get_settings()
+        self.assertEqual(settings["tasks"], set())
+
+    def test_control_file_rechecked_after_interval(self):
+        self.write_control_file({"profile_tasks": "a"}, mtime=1000)
+        with mock.patch.object(profiling.time, "monotonic", return_value=100.0):
+            self.assertEqual(profiling.get_settings()["tasks"], {"a"})
+
+        self.write_control_file({"profile_tasks": "b"}, mtime=2000)
+        with mock.patch.object(profiling.time, "monotonic", return_value=100.5):
+            self.assertEqual(profiling.get_settings()["tasks"], {"a"})
+        with mock.patch.object(profiling.time, "monotonic", return_value=101.5):
+            self.assertEqual(profiling.get_settings()["tasks"], {"b"})
+
+        os.remove(self.control_file)
+        with mock.patch.object(profiling.time, "monotonic", return_value=103.0):
+            self.assertEqual(profiling.get_settings()["tasks"], set())
+
+    def test_sample_rate(self):
+        @profiling.profiled("sampled")
+        def sampled():
+            return 1
+
+        self.write_control_file(
+            {"profile_tasks": "sampled", "profile_sample_rate": 0}
+        )
+        for _ in range(5):
+            sampled()
+        self.assertEqual(self.summaries(), [])
+
+        self.reset_settings()
+        self.write_control_file(
+            {"profile_tasks": "*", "profile_sample_rate": 1}, mtime=3000
+        )
+        for _ in range(3):
+            sampled()
+        summaries = self.summaries()
+        self.assertEqual([s["task"] for s in summaries], ["sampled"] * 3)
+        self.assertTrue(os.path.exists(summaries[0]["profile"]))
+
+    def test_nested_calls_are_sections(self):
+        @profiling.profiled()
+        def inner():
+            return "inner"
+
+        @profiling.profiled("outer")
+        def outer():
+            with profiling.profile_section("json_decode"):
+                json.loads("{}")
+            return [inner(), inner()]
+
+        self.write_control_file({"profile_tasks": "outer,inner"})
+        self.assertEqual(outer(), ["inner", "inner"])
+
+        (summary,) = self.summaries()
+        self.assertEqual(summary["task"], "outer")
+        self.assertEqual(summary["sections"]["inner"]["calls"], 2)
+        self.assertEqual(summary["sections"]["json_decode"]["calls"], 1)
+
+        report = profiling.write_report(self.profile_dir)
+        self.assertIn("== outer (1 runs, 0 errors)", report)
+        self.assertTrue(os.path.exists(os.path.join(self.profile_dir, "report.txt")))
+
+    @unittest.skipIf(tracemalloc.is_tracing(), "tracemalloc already in use")
+    def test_tracemalloc_reference_counting(self):
+        profiling._acquire_tracemalloc()
+        profiling._acquire_tracemalloc()
+        self.assertTrue(tracemalloc.is_tracing())
+        profiling._release_tracemalloc()
+        self.assertTrue(tracemalloc.is_tracing())
+        profiling._release_tracemalloc()
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @unittest.skipIf(tracemalloc.is_tracing(), "tracemalloc already in use")
+    def test_memory_snapshot(self):
+        @profiling.profiled("allocating")
+        def allocating():
+            return [str(i) for i in range(1000)]
+
+        self.write_control_file(
+            {"profile_tasks": "allocating", "profile_memory": True}
+        )
+        self.assertEqual(len(allocating()), 1000)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        (summary,) = self.summaries()
+        self.assertGreater(summary["peak_memory_bytes"], 0)
+        self.assertTrue(os.path.exists(summary["memory_snapshot"]))
+
+    def test_result_and_exception_unchanged(self):
+        @profiling.profiled("task")
+        def task(value):
+            if value is None:
+                raise KeyError("missing")
+            return value * 2
+
+        self.write_control_file({"profile_tasks": "task"})
+        self.assertEqual(task(21), 42)
+        with self.assertRaises(KeyError):
+            task(None)
+        self.assertEqual(
+            [s["error"] for s in self.summaries()], [None, "KeyError('missing')"]
+        )
+
+        with redirect_stdout(io.StringIO()):
+            with mock.patch.object(
+                profiling, "_write_profile", side_effect=OSError("disk full")
+            ):
+                self.assertEqual(task(1), 2)
+
+            with mock.patch.object(
+                cProfile.Profile, "enable", side_effect=RuntimeError("busy")
+            ):
+                self.assertEqual(task(2), 4)
+        self.assertIsNone(getattr(profiling._local, "session", None))
+        self.assertEqual(task(3), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
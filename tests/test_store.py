@@ -0,0 +1,194 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from app.utils.parsers import parse_us_common
+from app.utils import store
+from app.utils.store import (
+    extract_index_fields,
+    get_submission,
+    next_cursor,
+    query_submissions,
+    save_submission,
+)
+
+
+def us_common_response(broker_name, state, sic_codes, inception_date):
+    """Builds a fetch_submission_data response from a raw us-common payload."""
+    raw_data = {
+        "data": {
+            "facts": {
+                "insured_name": "Acme Widgets LLC",
+                "mailing_address": "1 Main St",
+                "mailing_state": state,
+                "primary_sic": sic_codes,
+            },
+            "options": {
+                "broker_name": broker_name,
+                "broker_state": "NJ",
+                "policy_inception_date": inception_date,
+                "normalized_product": ["Property"],
+            },
+        },
+        "scores": {"mailing_state": 0.98, "broker_name": 0.91},
+    }
+    return {"Common": parse_us_common(raw_data), "Loss Run": {}}
+
+
+class ResultStoreTest(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(self._remove_db)
+
+        save_submission(
+            "tx-1",
+            us_common_response("Acme Brokers", "NY", ["1731", "7389"], "2024-03-15"),
+            path=self.path,
+        )
+        save_submission(
+            "tx-2",
+            us_common_response("acme brokers", "ca", [{"code": "1731"}], "07/01/2024"),
+            path=self.path,
+        )
+        save_submission(
+            "tx-3",
+            us_common_response("Other Brokerage", "NY", [], "2025-01-10T00:00:00Z"),
+            path=self.path,
+        )
+
+    def _remove_db(self):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def query(self, **kwargs):
+        return [s["tx_id"] for s in query_submissions(path=self.path, **kwargs)]
+
+    def test_extract_index_fields(self):
+        fields = extract_index_fields(
+            us_common_response("Acme Brokers", "NY", ["1731"], "03/15/2024")
+        )
+        self.assertEqual(
+            fields,
+            {
+                "broker_name": "Acme Brokers",
+                "insured_state": "NY",
+                "policy_inception_date": "2024-03-15",
+                "primary_sic": ["1731"],
+            },
+        )
+
+    def test_get_submission(self):
+        submission = get_submission("tx-1", path=self.path)
+        self.assertEqual(submission["primary_sic"], ["1731", "7389"])
+        self.assertEqual(submission["policy_inception_date"], "2024-03-15")
+        self.assertEqual(
+            submission["structured_response"]["Common"]["Broker Details"][
+                "broker_name"
+            ],
+            {"value": "Acme Brokers", "score": 0.91},
+        )
+        self.assertIsNone(get_submission("missing", path=self.path))
+
+    def test_filters_are_case_insensitive(self):
+        self.assertEqual(
+            self.query(filters={"broker_name": "ACME BROKERS"}), ["tx-2", "tx-1"]
+        )
+        self.assertEqual(self.query(filters={"insured_state": "CA"}), ["tx-2"])
+        self.assertEqual(
+            self.query(filters={"insured_state": "ny", "broker_name": "acme brokers"}),
+            ["tx-1"],
+        )
+
+    def test_primary_sic_side_table(self):
+        self.assertEqual(self.query(primary_sic="1731"), ["tx-2", "tx-1"])
+        self.assertEqual(self.query(primary_sic="7389"), ["tx-1"])
+        self.assertEqual(self.query(primary_sic="0000"), [])
+
+    def test_resave_replaces_submission(self):
+        save_submission(
+            "tx-1",
+            us_common_response("New Broker", "TX", ["5812"], "2024-03-15"),
+            path=self.path,
+        )
+        self.assertEqual(self.query(filters={"broker_name": "acme brokers"}), ["tx-2"])
+        self.assertEqual(self.query(primary_sic="7389"), [])
+        self.assertEqual(self.query(primary_sic="5812"), ["tx-1"])
+        self.assertEqual(get_submission("tx-1", path=self.path)["insured_state"], "TX")
+        self.assertEqual(len(self.query(limit=10)), 3)
+
+    def test_retry_does_not_drop_stored_sections(self):
+        # Every data package failed on retry
+        self.assertFalse(save_submission("tx-1", {}, path=self.path))
+        # Only the loss run package succeeded on retry
+        self.assertTrue(
+            save_submission("tx-1", {"Loss Run": {"claims": 2}}, path=self.path)
+        )
+
+        submission = get_submission("tx-1", path=self.path)
+        self.assertEqual(submission["broker_name"], "Acme Brokers")
+        self.assertEqual(submission["primary_sic"], ["1731", "7389"])
+        self.assertIn("Common", submission["structured_response"])
+        self.assertEqual(
+            submission["structured_response"]["Loss Run"], {"claims": 2}
+        )
+        self.assertEqual(self.query(primary_sic="7389"), ["tx-1"])
+
+    def test_inception_range_bounds_are_inclusive(self):
+        self.assertEqual(
+            self.query(inception_from="2024-03-15", inception_to="2024-07-01"),
+            ["tx-2", "tx-1"],
+        )
+        self.assertEqual(
+            self.query(inception_from="03/16/2024", inception_to="2024-12-31"),
+            ["tx-2"],
+        )
+        self.assertEqual(self.query(inception_from="2025-01-10"), ["tx-3"])
+        self.assertEqual(self.query(inception_to="2024-03-14"), [])
+
+    def test_cursor_pagination(self):
+        page = query_submissions(limit=2, path=self.path)
+        self.assertEqual([s["tx_id"] for s in page], ["tx-3", "tx-2"])
+        self.assertEqual(self.query(before=next_cursor(page)), ["tx-1"])
+
+        page = query_submissions(inception_from="2024-01-01", limit=1, path=self.path)
+        self.assertEqual(
+            self.query(inception_from="2024-01-01", before=next_cursor(page, True)),
+            ["tx-2", "tx-1"],
+        )
+
+
+    def test_cursor_pagination_with_equal_timestamps(self):
+        with mock.patch.object(store.time, "time", return_value=1700000000.0):
+            for i in range(5):
+                save_submission(
+                    f"tie-{i}",
+                    us_common_response("Tie Brokers", "TX", ["5812"], "2024-05-01"),
+                    path=self.path,
+                )
+
+        for kwargs in ({}, {"inception_from": "2024-05-01"}):
+            seen = []
+            before = None
+            while True:
+                page = query_submissions(
+                    filters={"broker_name": "tie brokers"},
+                    limit=2,
+                    before=before,
+                    path=self.path,
+                    **kwargs,
+                )
+                if not page:
+                    break
+                seen.extend(s["tx_id"] for s in page)
+                before = next_cursor(page, bool(kwargs))
+            self.assertEqual(seen, [f"tie-{i}" for i in reversed(range(5))])
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            query_submissions(before="not-a-cursor", path=self.path)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import io
+import os
+import subprocess
+import sys
+import types
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest import mock
+
+from app.utils import workers
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class WorkerCliTest(unittest.TestCase):
+    def setUp(self):
+        env = mock.patch.dict(os.environ)
+        env.start()
+        self.addCleanup(env.stop)
+        os.environ.pop("WORKER_TASKS", None)
+
+        # Keep a developer's .env out of the tests
+        dotenv = mock.patch.dict(
+            sys.modules,
+            {"dotenv": types.SimpleNamespace(load_dotenv=lambda **kwargs: None)},
+        )
+        dotenv.start()
+        self.addCleanup(dotenv.stop)
+
+        start_workers = mock.patch.object(workers, "start_workers")
+        self.start_workers = start_workers.start()
+        self.addCleanup(start_workers.stop)
+
+    def started_task_names(self):
+        self.start_workers.assert_called_once()
+        return self.start_workers.call_args.args[0]
+
+    def test_parse_task_names(self):
+        self.assertEqual(
+            workers.parse_task_names(["upload_file, get_upload_url", "upload_file"]),
+            ["upload_file", "get_upload_url", "upload_file"],
+        )
+        self.assertEqual(workers.parse_task_names(["", " , "]), [])
+        self.assertEqual(workers.parse_task_names(None), [])
+
+    def test_comma_separated_and_repeated_tasks(self):
+        workers.main(
+            ["--task", "upload_file,get_upload_url", "-t", "fetch_submission_data"]
+        )
+        self.assertEqual(
+            self.started_task_names(),
+            ["upload_file", "get_upload_url", "fetch_submission_data"],
+        )
+        self.start_workers.return_value.join_processes.assert_called_once()
+
+    def test_worker_tasks_fallback(self):
+        os.environ["WORKER_TASKS"] = "trigger_processing,poll_submission_status"
+        workers.main([])
+        self.assertEqual(
+            self.started_task_names(), ["trigger_processing", "poll_submission_status"]
+        )
+
+    def test_task_option_overrides_worker_tasks(self):
+        os.environ["WORKER_TASKS"] = "trigger_processing"
+        workers.main(["--task", "upload_file"])
+        self.assertEqual(self.started_task_names(), ["upload_file"])
+
+    def test_all_tasks_by_default(self):
+        workers.main([])
+        self.assertEqual(self.started_task_names(), [])
+
+    def test_unknown_task_is_usage_error(self):
+        stderr = io.StringIO()
+        with redirect_stderr(stderr), self.assertRaises(SystemExit) as raised:
+            workers.main(["--task", "upload_file,nope"])
+        self.assertEqual(raised.exception.code, 2)
+        self.assertIn("Unknown task definition name(s): nope", stderr.getvalue())
+        self.start_workers.assert_not_called()
+
+    def test_list(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            self.assertEqual(workers.main(["--list"]), 0)
+        self.assertEqual(stdout.getvalue().split(), list(workers.TASK_FUNCTIONS))
+        self.start_workers.assert_not_called()
+
+    def test_list_does_not_import_clients(self):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys\n"
+                "from app.utils.workers import main\n"
+                "main(['--list'])\n"
+                "loaded = [name for name in ('conductor', 'dotenv', 'requests')"
+                " if name in sys.modules]\n"
+                "print('loaded:', *loaded)\n",
+            ],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.splitlines()[-1].strip(), "loaded:")
+
+
+if __name__ == "__main__":
+    unittest.main()